@@ -0,0 +1,529 @@
+import argparse
+import glob
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import matplotlib
+matplotlib.use("Agg")  # Render headlessly, no display needed for nightly runs
+import matplotlib.pyplot as plt
+import seaborn as sns
+import pandas as pd
+import cartopy.crs as ccrs
+import cartopy.feature as cfeature
+import cartopy.io.shapereader as shpreader
+from shapely.geometry import Point
+from shapely.prepared import prep
+
+# Default dataset and output location
+DEFAULT_INPUT = "Earthquake-Data/indonesia_earthquake_data_2020_onward.csv"
+DEFAULT_OUTPUT_DIR = "reports"
+
+# Bump this whenever the figure styling changes so cached images are re-rendered
+RENDER_VERSION = 1
+BASEMAP_DPI = 150
+
+# Map extents [min_lon, max_lon, min_lat, max_lat]
+INDONESIA_EXTENT = [94, 141, -11, 6]  # Batas Indonesia
+
+# Events further than this (in degrees) from every province polygon are reported
+# in a separate offshore slice instead of being attached to the nearest province
+MAX_PROVINCE_DISTANCE = 2.0
+OFFSHORE_SLICE = "Lainnya (lepas pantai)"
+
+# Magnitude classes as (label, lower bound inclusive, upper bound exclusive)
+MAGNITUDE_CLASSES = [
+    ("Sedang (5.0-5.9)", 5.0, 6.0),
+    ("Kuat (6.0-6.9)", 6.0, 7.0),
+    ("Besar (7.0+)", 7.0, float("inf")),
+]
+
+CHARTS = ("map", "histogram", "depth")
+SLICE_KINDS = ("all", "province", "month", "magnitude")
+IMAGE_EXTENSIONS = (".png", ".svg", ".tmp")
+DATA_COLUMNS = ["Time", "Magnitude", "Depth (km)", "Longitude", "Latitude"]
+
+# Base map images already loaded by this worker process, keyed by file path
+_basemap_images = {}
+
+
+def load_data(paths):
+    """
+    Load and merge earthquake CSV files.
+    Args:
+        paths (list[str]): CSV files to read, oldest snapshot first.
+    Returns:
+        pandas.DataFrame: One row per event (newest snapshot wins), sorted by time.
+    """
+    # Some snapshots have no depth column, so align every file on the same columns
+    frames = [pd.read_csv(path).reindex(columns=DATA_COLUMNS) for path in paths]
+    data = pd.concat(frames, ignore_index=True)
+    data["Time"] = pd.to_datetime(data["Time"], errors="coerce")
+    data = data.dropna(subset=["Time", "Magnitude", "Longitude", "Latitude"])
+
+    # USGS revises magnitude and location between snapshots, so an event is
+    # identified by its time alone and the newest snapshot's row is kept
+    depths = data.groupby("Time")["Depth (km)"].last()  # Newest known depth per event
+    data = data.drop_duplicates(subset="Time", keep="last").copy()
+    data["Depth (km)"] = data["Depth (km)"].fillna(data["Time"].map(depths))
+    return data.sort_values("Time", kind="stable").reset_index(drop=True)
+
+
+def load_provinces():
+    """
+    Load the Indonesian province polygons from Natural Earth.
+    Returns:
+        list[tuple]: (province name, geometry) tuples sorted by name.
+    """
+    path = shpreader.natural_earth(resolution="10m", category="cultural", name="admin_1_states_provinces")
+    provinces = [(record.attributes["name"], record.geometry)
+                 for record in shpreader.Reader(path).records()
+                 if record.attributes.get("adm0_a3") == "IDN"]
+    return sorted(provinces, key=lambda province: province[0])
+
+
+def assign_provinces(data, provinces):
+    """
+    Assign every event to exactly one province.
+    Events inside a province polygon get that province, offshore events get the
+    nearest one, and events far from every province get OFFSHORE_SLICE.
+    Args:
+        data (pandas.DataFrame): Earthquake events.
+        provinces (list[tuple]): Output of load_provinces.
+    Returns:
+        pandas.Series: Province name per event.
+    """
+    prepared = [(name, prep(geometry), geometry.simplify(0.01)) for name, geometry in provinces]
+    names = []
+    for lon, lat in zip(data["Longitude"], data["Latitude"]):
+        point = Point(lon, lat)
+        name = next((name for name, shape, _ in prepared if shape.contains(point)), None)
+        if name is None:
+            distance, name = min((outline.distance(point), name) for name, _, outline in prepared)
+            if distance > MAX_PROVINCE_DISTANCE:
+                name = OFFSHORE_SLICE
+        names.append(name)
+    return pd.Series(names, index=data.index)
+
+
+def province_extent(geometry, data):
+    """Map extent covering a province and its events, rounded to whole degrees."""
+    min_lon, min_lat, max_lon, max_lat = geometry.bounds
+    return [math.floor(min(min_lon, data["Longitude"].min())) - 1,
+            math.ceil(max(max_lon, data["Longitude"].max())) + 1,
+            math.floor(min(min_lat, data["Latitude"].min())) - 1,
+            math.ceil(max(max_lat, data["Latitude"].max())) + 1]
+
+
+def build_slices(data, provinces):
+    """
+    Split the data into report slices: the whole country, each province,
+    each month and each magnitude class.
+    Args:
+        data (pandas.DataFrame): Earthquake events.
+        provinces (list[tuple]): Output of load_provinces.
+    Returns:
+        list[tuple]: (slice kind, slice name, map extent, data slice) tuples.
+    """
+    slices = [("all", "Indonesia", INDONESIA_EXTENT, data)]
+
+    assigned = assign_provinces(data, provinces)
+    for province, geometry in provinces:
+        in_province = data[assigned == province]
+        if not in_province.empty:
+            slices.append(("province", province, province_extent(geometry, in_province), in_province))
+    slices.append(("province", OFFSHORE_SLICE, INDONESIA_EXTENT, data[assigned == OFFSHORE_SLICE]))
+
+    months = data["Time"].dt.to_period("M").astype(str)
+    for month in sorted(months.unique()):
+        slices.append(("month", month, INDONESIA_EXTENT, data[months == month]))
+
+    for label, low, high in MAGNITUDE_CLASSES:
+        in_class = (data["Magnitude"] >= low) & (data["Magnitude"] < high)
+        slices.append(("magnitude", label, INDONESIA_EXTENT, data[in_class]))
+
+    return [entry for entry in slices if not entry[3].empty]
+
+
+def slugify(text):
+    """Turn a slice name into a safe file name fragment."""
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def content_hash(data, params):
+    """
+    Hash a data slice together with the plot parameters.
+    Args:
+        data (pandas.DataFrame): Data slice being plotted.
+        params (dict): Plot parameters (must be JSON serialisable).
+    Returns:
+        str: Hex digest identifying the rendered figure.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+    digest.update(data[DATA_COLUMNS].to_csv(index=False).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def basemap_path(output_dir, extent):
+    """Path of the cached base map image for a map extent."""
+    key = hashlib.sha256(json.dumps([extent, BASEMAP_DPI, RENDER_VERSION]).encode("utf-8")).hexdigest()
+    return os.path.join(output_dir, "_basemaps", f"basemap_{key[:16]}.png")
+
+
+def save_figure(fig, path, fmt, **kwargs):
+    """Save a figure via a temporary file so interrupted runs never leave partial images."""
+    tmp_path = f"{path}.tmp"
+    try:
+        fig.savefig(tmp_path, format=fmt, **kwargs)
+        os.replace(tmp_path, path)
+    finally:
+        plt.close(fig)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def render_basemap(extent, path):
+    """
+    Render the land/ocean/coastline/border layers for one extent to a PNG.
+    Args:
+        extent (list[float]): Map extent [min_lon, max_lon, min_lat, max_lat].
+        path (str): Output PNG path.
+    Returns:
+        str: The output path.
+    """
+    width = 12
+    height = width * (extent[3] - extent[2]) / (extent[1] - extent[0])
+    fig = plt.figure(figsize=(width, height))
+    try:
+        ax = fig.add_axes([0, 0, 1, 1], projection=ccrs.PlateCarree())
+        ax.set_extent(extent, crs=ccrs.PlateCarree())
+        ax.add_feature(cfeature.LAND, color='lightgray')  # Warna daratan
+        ax.add_feature(cfeature.OCEAN, color='aqua')      # Warna laut
+        ax.add_feature(cfeature.COASTLINE)               # Garis pantai
+        ax.add_feature(cfeature.BORDERS, linestyle=':')  # Garis batas negara
+        ax.axis("off")
+        save_figure(fig, path, "png", dpi=BASEMAP_DPI)
+    finally:
+        plt.close(fig)
+    return path
+
+
+def prefetch_basemap_features(extents):
+    """
+    Download the Natural Earth layers used by the base maps in this process,
+    so worker processes never download the same shapefiles concurrently.
+    Args:
+        extents (list[list[float]]): Base map extents about to be rendered.
+    """
+    fetched = set()
+    for extent in extents:
+        for feature in (cfeature.LAND, cfeature.OCEAN, cfeature.COASTLINE, cfeature.BORDERS):
+            # Same scale cartopy picks when the feature is drawn at this extent
+            scale = feature.scaler.scale_from_extent(extent)
+            if (feature.name, scale) not in fetched:
+                list(feature.with_scale(scale).geometries())
+                fetched.add((feature.name, scale))
+
+
+def load_basemap(path):
+    """Read a base map image once per worker process."""
+    if path not in _basemap_images:
+        _basemap_images[path] = plt.imread(path)
+    return _basemap_images[path]
+
+
+def draw_map(job):
+    """Scatter the events over the pre-rendered base map."""
+    data = job["data"]
+    extent = job["extent"]
+    fig = plt.figure(figsize=(12, 8))
+    ax = plt.axes(projection=ccrs.PlateCarree())
+    ax.set_extent(extent, crs=ccrs.PlateCarree())
+    ax.imshow(load_basemap(job["basemap"]), origin="upper", extent=extent,
+              transform=ccrs.PlateCarree())
+    scatter = ax.scatter(data['Longitude'], data['Latitude'],
+                         c=data['Magnitude'], cmap='viridis', s=50, alpha=0.7, transform=ccrs.PlateCarree())
+    plt.colorbar(scatter, ax=ax, label='Magnitude')
+    ax.set_title(f"Sebaran Lokasi Gempa - {job['slice']}", fontsize=14)
+    return fig
+
+
+def draw_histogram(job):
+    """Histogram of magnitudes, as in Showhistogram.py."""
+    fig = plt.figure(figsize=(10, 6))
+    sns.histplot(job["data"]['Magnitude'], bins=20, kde=len(job["data"]) > 1, color='blue')
+    plt.title(f"Distribusi Magnitudo Gempa - {job['slice']}", fontsize=14)
+    plt.xlabel('Magnitude', fontsize=12)
+    plt.ylabel('Frekuensi', fontsize=12)
+    plt.grid(alpha=0.5)
+    return fig
+
+
+def draw_depth(job):
+    """Scatter of magnitude against depth, as in Checkdepth.py."""
+    fig = plt.figure(figsize=(12, 8))
+    plt.scatter(job["data"]['Depth (km)'], job["data"]['Magnitude'], alpha=0.6, color='red')
+    plt.title(f"Korelasi Kedalaman dan Magnitudo Gempa - {job['slice']}", fontsize=14)
+    plt.xlabel('Depth (km)', fontsize=12)
+    plt.ylabel('Magnitude', fontsize=12)
+    plt.grid(alpha=0.5)
+    return fig
+
+
+DRAWERS = {
+    "map": draw_map,
+    "histogram": draw_histogram,
+    "depth": draw_depth,
+}
+
+
+def render_figure(job):
+    """
+    Render a single figure to disk (runs inside a worker process).
+    Args:
+        job (dict): Figure job built by build_jobs.
+    Returns:
+        float: Render time in seconds.
+    """
+    start = time.perf_counter()
+    try:
+        fig = DRAWERS[job["chart"]](job)
+        save_figure(fig, job["path"], job["format"], bbox_inches="tight")
+    finally:
+        # Workers are reused across many figures, so never leave one open
+        plt.close("all")
+    return time.perf_counter() - start
+
+
+def build_jobs(slices, output_dir, formats):
+    """
+    Create one figure job per slice, chart and format.
+    Args:
+        slices (list[tuple]): Output of build_slices.
+        output_dir (str): Report output directory.
+        formats (list[str]): Image formats, e.g. ['png', 'svg'].
+    Returns:
+        list[dict]: Figure jobs with their content-addressed output path.
+    """
+    jobs = []
+    for slice_kind, slice_name, extent, data in slices:
+        for chart in CHARTS:
+            if chart == "depth" and data["Depth (km)"].isna().all():
+                continue  # No depth values to plot for this slice
+            for fmt in formats:
+                params = {
+                    "version": RENDER_VERSION,
+                    "chart": chart,
+                    "slice": slice_name,
+                    "extent": extent if chart == "map" else None,
+                    "format": fmt,
+                }
+                digest = content_hash(data, params)
+                filename = f"{slugify(slice_name)}_{chart}_{digest[:12]}.{fmt}"
+                jobs.append({
+                    "chart": chart,
+                    "slice_kind": slice_kind,
+                    "slice": slice_name,
+                    "extent": extent,
+                    "format": fmt,
+                    "hash": digest,
+                    "path": os.path.join(output_dir, slice_kind, filename),
+                    "basemap": basemap_path(output_dir, extent),
+                    "data": data[DATA_COLUMNS],
+                })
+    return jobs
+
+
+def load_previous_timings(output_dir):
+    """Render times recorded in the previous index.json, keyed by figure hash."""
+    try:
+        with open(os.path.join(output_dir, "index.json"), encoding="utf-8") as f:
+            figures = json.load(f).get("figures", [])
+    except (OSError, ValueError):
+        return {}
+    return {entry["hash"]: entry["seconds"] for entry in figures
+            if entry.get("status") in ("rendered", "cached") and entry.get("seconds") is not None}
+
+
+def index_entry(job, output_dir, status, seconds, run_seconds=0.0, error=None):
+    """
+    Describe one figure for the index file.
+    Args:
+        job (dict): Figure job built by build_jobs.
+        output_dir (str): Report output directory.
+        status (str): 'rendered', 'cached' or 'failed'.
+        seconds (float): Time it took to render the image (None if unknown).
+        run_seconds (float): Time spent on the figure in this run (0 when skipped).
+        error (str): Failure message, if any.
+    Returns:
+        dict: Index entry.
+    """
+    entry = {
+        "chart": job["chart"],
+        "slice_kind": job["slice_kind"],
+        "slice": job["slice"],
+        "format": job["format"],
+        "path": os.path.relpath(job["path"], output_dir),
+        "hash": job["hash"],
+        "events": len(job["data"]),
+        "status": status,
+        "seconds": round(seconds, 4) if seconds is not None else None,
+        "run_seconds": round(run_seconds, 4),
+    }
+    if error:
+        entry["error"] = error
+    return entry
+
+
+def prune_outputs(output_dir, jobs):
+    """
+    Remove images and base maps that the current jobs no longer reference.
+    Args:
+        output_dir (str): Report output directory.
+        jobs (list[dict]): Figure jobs of the current run.
+    Returns:
+        int: Number of files removed.
+    """
+    keep = {os.path.abspath(job["path"]) for job in jobs}
+    keep.update(os.path.abspath(job["basemap"]) for job in jobs if job["chart"] == "map")
+    subdirs = {"_basemaps"} | {job["slice_kind"] for job in jobs} | set(SLICE_KINDS)
+
+    removed = 0
+    for subdir in subdirs:
+        directory = os.path.join(output_dir, subdir)
+        if not os.path.isdir(directory):
+            continue
+        for name in os.listdir(directory):
+            path = os.path.abspath(os.path.join(directory, name))
+            if name.endswith(IMAGE_EXTENSIONS) and path not in keep:
+                os.remove(path)
+                removed += 1
+    return removed
+
+
+def generate_reports(paths, output_dir=DEFAULT_OUTPUT_DIR, formats=("png",), workers=None):
+    """
+    Render all report figures in a process pool, skipping unchanged ones.
+    Args:
+        paths (list[str]): Input CSV files, oldest snapshot first.
+        output_dir (str): Report output directory.
+        formats (list[str]): Image formats to generate.
+        workers (int): Number of worker processes (defaults to CPU count).
+    Returns:
+        dict: The index written to index.json.
+    """
+    run_start = time.perf_counter()
+    data = load_data(paths)
+    jobs = build_jobs(build_slices(data, load_provinces()), output_dir, formats)
+
+    for job in jobs:
+        os.makedirs(os.path.dirname(job["path"]), exist_ok=True)
+    os.makedirs(os.path.join(output_dir, "_basemaps"), exist_ok=True)
+
+    # Cached figures keep the render time recorded when they were last rendered
+    previous_timings = load_previous_timings(output_dir)
+    entries = []
+    pending = []
+    for job in jobs:
+        if os.path.exists(job["path"]):
+            entries.append(index_entry(job, output_dir, "cached", previous_timings.get(job["hash"])))
+        else:
+            pending.append(job)
+
+    # Base maps are rendered first so every map figure can reuse them
+    basemaps = {job["basemap"]: job["extent"] for job in pending if job["chart"] == "map"}
+    missing = {path: extent for path, extent in basemaps.items() if not os.path.exists(path)}
+    basemap_errors = {}
+    if missing:
+        try:
+            prefetch_basemap_features(list(missing.values()))
+        except Exception as e:
+            print(f"Error downloading map features: {e}")
+            basemap_errors = {path: f"Base map features unavailable: {e}" for path in missing}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        to_render = {path: extent for path, extent in missing.items() if path not in basemap_errors}
+        if to_render:
+            print(f"Rendering {len(to_render)} base map(s)...")
+        basemap_futures = {executor.submit(render_basemap, extent, path): path
+                           for path, extent in to_render.items()}
+        for future in as_completed(basemap_futures):
+            path = basemap_futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error rendering base map {path}: {e}")
+                basemap_errors[path] = f"Base map failed: {e}"
+
+        # Map figures whose base map failed are recorded as failed, not submitted
+        runnable = []
+        for job in pending:
+            if job["chart"] == "map" and job["basemap"] in basemap_errors:
+                entries.append(index_entry(job, output_dir, "failed", None,
+                                           error=basemap_errors[job["basemap"]]))
+            else:
+                runnable.append(job)
+
+        print(f"Rendering {len(runnable)} figure(s), {len(jobs) - len(pending)} unchanged...")
+        futures = {executor.submit(render_figure, job): job for job in runnable}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                seconds = future.result()
+                entries.append(index_entry(job, output_dir, "rendered", seconds, seconds))
+            except Exception as e:
+                print(f"Error rendering {job['path']}: {e}")
+                entries.append(index_entry(job, output_dir, "failed", None, error=str(e)))
+
+    removed = prune_outputs(output_dir, jobs)
+    if removed:
+        print(f"Removed {removed} outdated image(s).")
+
+    entries.sort(key=lambda entry: entry["path"])
+    index = {
+        "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "inputs": list(paths),
+        "total_seconds": round(time.perf_counter() - run_start, 4),
+        "figures": entries,
+    }
+    index_path = os.path.join(output_dir, "index.json")
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    print(f"Index saved to {index_path}")
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate static earthquake map and chart reports.")
+    parser.add_argument("inputs", nargs="*", default=[DEFAULT_INPUT],
+                        help="CSV files or glob patterns (default: %(default)s)")
+    parser.add_argument("-o", "--output-dir", default=DEFAULT_OUTPUT_DIR,
+                        help="Directory for images and index.json (default: %(default)s)")
+    parser.add_argument("-f", "--formats", nargs="+", default=["png"], choices=["png", "svg"],
+                        help="Image formats to generate (default: png)")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Number of worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    paths = sorted({path for pattern in args.inputs for path in glob.glob(pattern)})
+    if not paths:
+        parser.error("No input CSV files found.")
+
+    index = generate_reports(paths, args.output_dir, args.formats, args.workers)
+
+    # Non-zero exit status lets a scheduler detect a partially failed run
+    failed = sum(1 for entry in index["figures"] if entry["status"] == "failed")
+    if failed:
+        print(f"{failed} figure(s) failed.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()